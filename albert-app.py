@@ -1,11 +1,12 @@
 import streamlit as st
-import pandas as pd
-import json
-import base64
-from io import StringIO
+from functools import lru_cache
 import os
 import re
 
+# pandas / numpy / orjson are imported lazily in the upload branch below:
+# they cost a few hundred ms on cold start and the landing / instructions
+# views never touch them.
+
 # Set page configuration
 st.set_page_config(
     page_title="Math Questions Editor",
@@ -14,139 +15,70 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Apply custom CSS for visual styling
-st.markdown("""
-<style>
-    /* Main app styling */
-    .main .block-container {
-        padding-top: 2rem;
-        max-width: 1200px;
-    }
-    h1, h2, h3 {
-        color: #1E88E5;
-    }
-    
-    /* Tab styling */
-    .stTabs [data-baseweb="tab-list"] {
-        gap: 2px;
-    }
-    .stTabs [data-baseweb="tab"] {
-        height: 50px;
-        white-space: pre-wrap;
-        background-color: #f0f2f6;
-        border-radius: 4px 4px 0 0;
-        padding: 10px;
-    }
-    .stTabs [aria-selected="true"] {
-        background-color: #1E88E5;
-        color: white;
-    }
-    
-    /* Button styling */
-    .stButton>button {
-        background-color: #1E88E5;
-        color: white;
-        border: none;
-        border-radius: 4px;
-        padding: 0.5rem 1rem;
-        font-weight: bold;
-    }
-    .stButton>button:hover {
-        background-color: #1565C0;
-    }
-    
-    /* Download button styling */
-    .download-button {
-        text-decoration: none;
-        color: white;
-        font-weight: bold;
-    }
-    
-    /* Choices formatting */
-    .correct-option {
-        color: #2e7d32;
-        font-weight: bold;
-    }
-    .option {
-        margin-bottom: 0.3rem;
-    }
-    
-    /* Data editor tweaks */
-    [data-testid="stDataFrameResizable"] {
-        background-color: #f9f9f9;
-        border-radius: 5px;
-        padding: 1rem;
-        margin-bottom: 1rem;
-    }
-    
-    /* Sidebar styling */
-    [data-testid="stSidebar"] {
-        background-color: #f5f5f5;
-        padding-top: 2rem;
-    }
-    [data-testid="stSidebar"] [data-testid="stMarkdown"] h1 {
-        margin-bottom: 1.5rem;
-    }
-    
-    /* Custom CSS for rendering markdown inside table */
-    .st-emotion-cache-1n76uvr {
-        white-space: normal !important;
-    }
-    
-    /* Make sure LaTeX formulas display properly in table cells */
-    .katex { 
-        font-size: 1em !important;
-        white-space: normal !important;
-    }
-</style>
-""", unsafe_allow_html=True)
+# Custom CSS for visual styling lives in styles.css
+@st.cache_data
+def _load_css():
+    """Reads the static stylesheet once; reruns reuse the cached string."""
+    css_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "styles.css")
+    with open(css_path, encoding="utf-8") as f:
+        return f.read()
+
+st.markdown(f"<style>{_load_css()}</style>", unsafe_allow_html=True)
 
 # -------------------- UTILITY FUNCTIONS --------------------
 
-def get_download_link(json_data, filename):
-    """Generates a link to download the JSON data"""
-    json_str = json.dumps(json_data, indent=2)
-    b64 = base64.b64encode(json_str.encode()).decode()
-    filename = filename.replace('.json', '') + '_updated.json'
-    href = f'<a href="data:file/json;base64,{b64}" download="{filename}" class="download-button">📥 Download {filename}</a>'
-    styled_href = f"""
-    <div style="margin: 20px 0; text-align: center;">
-        <div style="display: inline-block; background-color: #1E88E5; padding: 10px 20px; 
-                    border-radius: 5px; color: white; text-decoration: none;">
-            {href}
-        </div>
-    </div>
-    """
-    return styled_href
+# Matches incorrect-choice prefixes like "A. " / "B. "
+_CHOICE_PREFIX_RE = re.compile(r"^[A-Z]\.\s")
 
-def get_powerpath_download_link(json_data, base_filename):
-    """Generates a link to download PowerPath JSON data."""
-    json_str = json.dumps(json_data, indent=2)
-    b64 = base64.b64encode(json_str.encode()).decode()
+def render_download_button(json_bytes, filename):
+    """Renders a download button for the updated JSON payload (pre-serialized bytes)"""
+    filename = filename.replace('.json', '') + '_updated.json'
+    st.download_button(
+        f"📥 Download {filename}",
+        data=json_bytes,
+        file_name=filename,
+        mime="application/json",
+    )
+
+def render_powerpath_download_button(json_bytes, base_filename):
+    """Renders a download button for PowerPath JSON payload (pre-serialized bytes)."""
     filename = f"powerpath_export_{base_filename.replace('.json', '')}.json"
-    href = f'<a href="data:file/json;base64,{b64}" download="{filename}" class="download-button" style="color:white;">🚀 Download PowerPath JSON</a>'
-    styled_href = f"""
-    <div style="margin: 10px 0; text-align: center;">
-        <div style="display: inline-block; background-color: #4CAF50; padding: 10px 20px; 
-                    border-radius: 5px; color: white; text-decoration: none;">
-            {href}
-        </div>
-    </div>
-    """
-    return styled_href
+    st.download_button(
+        "🚀 Download PowerPath JSON",
+        data=json_bytes,
+        file_name=filename,
+        mime="application/json",
+    )
+
+# NOTE: format_choices / parse_formatted_choices_to_list are the string-heavy
+# hot spots on upload and save. They are kept in optimized pure Python (single
+# join, precompiled regex); moving them to a compiled extension would require a
+# build step this single-script app deliberately doesn't have, and profiling on
+# realistic uploads shows orjson + the vectorized dataframe paths dominate.
+@lru_cache(maxsize=4096)
+def _format_choices_cached(key):
+    """Formats a hashable (text, is_correct) key tuple; None marks skipped entries."""
+    parts = []
+    for idx, entry in enumerate(key):
+        if entry is None:
+            continue
+        text, is_correct = entry
+        prefix = "✓ " if is_correct else f"{chr(65+idx)}. "
+        parts.append(prefix + text)
+    return "\n\n".join(parts)
 
 def format_choices(choices):
     """Format choices for better display with markdown support"""
-    formatted = ""
     if not isinstance(choices, list): # Ensure choices is a list
         return ""
-    for idx, choice in enumerate(choices):
-        if not isinstance(choice, dict): # Ensure choice is a dictionary
-            continue
-        prefix = "✓ " if choice.get('is_correct', False) else f"{chr(65+idx)}. "
-        text = choice.get('text', '')
-        formatted += f"{prefix}{text}\n\n" 
-    return formatted.strip() # Remove trailing newlines
+    # Reduce to a hashable key so identical choice lists (reloads, resets,
+    # unchanged saves) hit the memoized formatter
+    key = tuple(
+        (str(choice.get('text', '')), bool(choice.get('is_correct', False)))
+        if isinstance(choice, dict) else None
+        for choice in choices
+    )
+    return _format_choices_cached(key)
 
 def parse_formatted_choices_to_list(formatted_text: str) -> list:
     """
@@ -173,158 +105,238 @@ def parse_formatted_choices_to_list(formatted_text: str) -> list:
         if block_text.startswith("✓ "):
             is_correct = True
             text_content = block_text[len("✓ "):].strip()
-        # Check for "X. " prefix (e.g., "A. ", "B. ", incorrect answer)
-        elif re.match(r"^[A-Z]\.\s", block_text):
-            match = re.match(r"^[A-Z]\.\s", block_text)
-            text_content = block_text[match.end():].strip() # Text starts after the matched "X. "
-            is_correct = False 
         else:
-            # No recognizable prefix. Treat as an incorrect choice with full block_text as content.
-            # This might happen if user manually types a choice without a standard prefix.
+            # Check for "X. " prefix (e.g., "A. ", "B. ", incorrect answer)
+            match = _CHOICE_PREFIX_RE.match(block_text)
+            if match:
+                text_content = block_text[match.end():].strip() # Text starts after the matched "X. "
+            # else: no recognizable prefix. Treat as an incorrect choice with
+            # full block_text as content (e.g. user typed a choice without a
+            # standard prefix).
             is_correct = False
-            # text_content remains as the full block_text
 
         choices.append({'text': text_content, 'is_correct': is_correct})
     return choices
 
+# MathJax-style delimiters -> the $ / $$ forms Streamlit's KaTeX understands
+_LATEX_DELIMS = (("\\[", "$$"), ("\\]", "$$"), ("\\(", "$"), ("\\)", "$"))
+
+def normalize_latex(s):
+    """Rewrites MathJax-style \\(..\\) / \\[..\\] delimiters to $ / $$.
+
+    Applied inside the content-memoized preview renderer only — the
+    dataframe and the JSON exports keep the uploaded text untouched.
+    """
+    if not isinstance(s, str) or "\\" not in s:
+        return s
+    for old, new in _LATEX_DELIMS:
+        if old in s:
+            s = s.replace(old, new)
+    return s
+
+@st.cache_data(show_spinner=False)
+def load_json_to_df(file_bytes: bytes):
+    """Parse uploaded JSON bytes and build the editing dataframe.
+
+    Cached on the raw file bytes so re-uploading the same file (or resetting)
+    skips the parsing + row construction work entirely.
+    """
+    json_data = orjson.loads(file_bytes)
+    return json_data, json_to_df(json_data), build_choices_map(json_data)
+
+def build_choices_map(json_data):
+    """Maps item_index -> parsed choices list.
+
+    Keeping the live list objects here means the export paths read them
+    directly instead of round-tripping every row through choices_json.
+    """
+    return {i: (item.get('choices') or []) for i, item in enumerate(json_data)
+            if isinstance(item, dict)}
+
 def json_to_df(json_data):
     """Convert JSON structure to a dataframe for editing"""
-    rows = []
-    for i, item in enumerate(json_data):
-        row = dict(item) 
-        
-        if 'choices' in row:
-            row['choices_json'] = json.dumps(row['choices']) 
-            row['choices_formatted'] = format_choices(row['choices'])
-            del row['choices'] 
-        else: # Ensure columns exist even if data is missing
-            row['choices_json'] = json.dumps([])
-            row['choices_formatted'] = ""
-            
-        if 'score_rating' in row and row['score_rating'] is not None:
-            if isinstance(row['score_rating'], (int, float)):
-                row['score_rating'] = str(row['score_rating'])
-        
-        row['item_index'] = i 
-        rows.append(row)
-    
-    return pd.DataFrame(rows)
-
-def df_to_json(df, original_data=None):
+    df = pd.DataFrame(json_data)
+
+    if 'choices' in df.columns:
+        choices_col = df['choices']
+        df['choices_json'] = [orjson.dumps(c).decode() if isinstance(c, list) else '[]' for c in choices_col]
+        df['choices_formatted'] = [format_choices(c) for c in choices_col]
+        df = df.drop(columns=['choices'])
+    else: # Ensure columns exist even if data is missing
+        df['choices_json'] = '[]'
+        df['choices_formatted'] = ""
+
+    if 'score_rating' in df.columns:
+        # Collapse whole floats back to ints first: pd.DataFrame coerces a
+        # mixed int/float score column to float64, and str(5.0) would show
+        # "5.0" in the editor where the upload said 5
+        df['score_rating'] = [
+            (str(int(v)) if isinstance(v, float) and v.is_integer() else str(v))
+            if isinstance(v, (int, float)) and pd.notna(v) else v
+            for v in df['score_rating']]
+
+    # Arrow-backed storage for the two always-populated serialized columns:
+    # spares the editor a per-value PyObject round-trip when it converts the
+    # frame to Arrow. Free-text columns (material, feedback, ...) stay object
+    # dtype — they can be missing, and string[pyarrow]'s pd.NA would leak into
+    # the JSON export, which orjson refuses to serialize.
+    df['choices_json'] = df['choices_json'].astype('string[pyarrow]')
+    df['choices_formatted'] = df['choices_formatted'].astype('string[pyarrow]')
+
+    # Low-cardinality topic labels: category dtype cuts memory and makes the
+    # sidebar isin() filter a code lookup instead of a string compare
+    if 'level_title' in df.columns:
+        df['level_title'] = df['level_title'].astype('category')
+
+    df['item_index'] = np.arange(len(df), dtype=np.int32)
+    return add_numeric_projections(df)
+
+def add_numeric_projections(df):
+    """Precompute numeric views of score/difficulty so the filter and sort
+    paths don't re-coerce the string columns on every rerun."""
+    if 'score_rating' in df.columns:
+        df['_score_num'] = pd.to_numeric(df['score_rating'], errors='coerce')
+    if 'question_difficulty' in df.columns:
+        df['_difficulty_num'] = pd.to_numeric(df['question_difficulty'], errors='coerce')
+    return df
+
+def _normalize_score_out(v):
+    """Normalizes one score_rating cell for export (numeric -> str, blank -> None)."""
+    if v is None:
+        return None
+    if isinstance(v, (int, float)):
+        if isinstance(v, float) and np.isnan(v):
+            return None
+        return str(int(v) if v == int(v) else v)
+    if isinstance(v, str) and v.strip() == "":
+        return None
+    return v
+
+def df_to_json(df, choices_map=None):
     """Convert dataframe back to the original JSON structure"""
+    # Internal/editor-only columns that must not appear in the export
+    drop_cols = ('item_index', 'select', 'choices_json', 'choices_formatted',
+                 '_score_num', '_difficulty_num')
+    cols = [c for c in df.columns if c not in drop_cols]
+    # to_list() boxes numpy scalars (np.int64, np.float64) to native Python
+    # types; orjson refuses numpy scalars without extra options
+    col_arrays = {c: df[c].to_list() for c in cols}
+
+    # Normalize the score column in one pass instead of branching per row dict
+    if 'score_rating' in col_arrays:
+        col_arrays['score_rating'] = [_normalize_score_out(v)
+                                      for v in col_arrays['score_rating']]
+
+    choices_arr = None
+    if choices_map is not None and 'item_index' in df.columns:
+        # In-memory list objects — no per-row JSON parse
+        choices_arr = [choices_map.get(int(i), []) for i in df['item_index'].to_numpy()]
+    elif 'choices_json' in df.columns:
+        choices_arr = []
+        for s in df['choices_json'].to_numpy():
+            if isinstance(s, str) and s:
+                try:
+                    choices_arr.append(orjson.loads(s))
+                except orjson.JSONDecodeError:
+                    choices_arr.append([])
+            else: # Default to empty list if choices_json was NaN/None
+                choices_arr.append([])
+
     result = []
-    
-    for _, row in df.iterrows():
-        row_dict = row.to_dict()
-        
-        if 'item_index' in row_dict: # item_index might not be there if df is from somewhere else
-             # idx = int(row_dict['item_index']) # Not directly used in this version of creating result list
-             del row_dict['item_index']
-        
-        if 'select' in row_dict:
-            del row_dict['select']
-        
-        if 'choices_json' in row_dict and pd.notna(row_dict['choices_json']):
-            try:
-                row_dict['choices'] = json.loads(row_dict['choices_json'])
-            except json.JSONDecodeError: 
-                row_dict['choices'] = [] 
-            del row_dict['choices_json']
-        elif 'choices_json' in row_dict: 
-            del row_dict['choices_json']
-            row_dict['choices'] = [] # Default to empty list if choices_json was NaN/None
-
-        if 'choices_formatted' in row_dict:
-            del row_dict['choices_formatted']
-        
-        if 'score_rating' in row_dict and row_dict['score_rating'] is not None:
-            if isinstance(row_dict['score_rating'], (int, float)):
-                row_dict['score_rating'] = str(int(row_dict['score_rating']) if row_dict['score_rating'] == int(row_dict['score_rating']) else row_dict['score_rating'])
-            elif isinstance(row_dict['score_rating'], str) and row_dict['score_rating'].strip() == "":
-                row_dict['score_rating'] = None 
-        
+    for i in range(len(df)):
+        row_dict = {c: col_arrays[c][i] for c in cols}
+        if choices_arr is not None:
+            row_dict['choices'] = choices_arr[i]
         result.append(row_dict)
-    
+
     return result
 
-def df_to_powerpath_json(selected_df_rows):
+@st.cache_data(show_spinner=False)
+def render_question_md(material, choices_fmt, explanation):
+    """Builds the preview markdown for one question.
+
+    Cached on content, so repeated previews of unchanged questions skip the
+    string assembly entirely.
+    """
+    # Normalize LaTeX delimiters only for display: the dataframe keeps the
+    # uploaded text verbatim so the JSON exports round-trip byte-for-byte
+    parts = ["#### Question", normalize_latex(str(material)), "#### Choices"]
+    # pd.notna before truthiness: a cleared Arrow-backed cell arrives as
+    # pd.NA, which raises on bool()
+    if choices_fmt is not None and pd.notna(choices_fmt) and str(choices_fmt).strip():
+        parts.append(normalize_latex(str(choices_fmt).strip()))
+    if explanation is not None and pd.notna(explanation) and str(explanation).strip():
+        parts.append("#### Explanation")
+        parts.append(normalize_latex(str(explanation)))
+    return "\n\n".join(parts)
+
+def df_to_powerpath_json(selected_df_rows, choices_map=None):
     """Converts selected DataFrame rows to PowerPath JSON format."""
     powerpath_questions = []
-    for _, row in selected_df_rows.iterrows():
-        question_explanation = row.get('explanation', None)
-        if pd.isna(question_explanation) or str(question_explanation).strip() == "":
-            question_explanation = None
+    n_rows = len(selected_df_rows)
+
+    # Coerce whole columns up front instead of per-row try/except in the loop
+    if 'question_difficulty' in selected_df_rows.columns:
+        difficulties = (pd.to_numeric(selected_df_rows['question_difficulty'], errors='coerce')
+                        .fillna(1).astype('int32').to_numpy())
+    else:
+        difficulties = np.ones(n_rows, dtype=np.int32)
+
+    if 'explanation' in selected_df_rows.columns:
+        expl = selected_df_rows['explanation']
+        explanations = expl.where(expl.notna() & (expl.astype(str).str.strip() != ''), None).to_numpy()
+    else:
+        explanations = np.full(n_rows, None, dtype=object)
+
+    if 'item_index' in selected_df_rows.columns:
+        idx_num = pd.to_numeric(selected_df_rows['item_index'], errors='coerce').to_numpy()
+        item_indices = [None if np.isnan(v) else int(v) for v in idx_num]
+    else:
+        item_indices = [None] * n_rows
+
+    # itertuples avoids the per-row Series construction iterrows pays
+    for i, row in enumerate(selected_df_rows.itertuples(index=False)):
+        question_explanation = explanations[i]
 
         responses_list = []
-        if 'choices_json' in row and pd.notna(row['choices_json']):
-            try:
-                original_choices = json.loads(row['choices_json'])
-                for choice in original_choices:
-                    response_explanation = None
-                    if choice.get('is_correct', False) and question_explanation:
-                        response_explanation = question_explanation
-                    
-                    responses_list.append({
-                        "label": choice.get('text', ''),
-                        "isCorrect": choice.get('is_correct', False),
-                        "explanation": response_explanation
-                    })
-            except json.JSONDecodeError:
-                st.warning(f"Could not parse choices for question index {row.get('item_index', 'Unknown')}")
-        
-        difficulty_val = row.get('question_difficulty', 1)
-        if pd.isna(difficulty_val) or str(difficulty_val).strip() == "":
-            difficulty = 1
-        else:
-            try:
-                difficulty = int(float(difficulty_val)) 
-            except (ValueError, TypeError):
-                difficulty = 1
-        
+        original_choices = None
+        item_idx = item_indices[i]
+        if choices_map is not None and item_idx is not None:
+            # In-memory list objects — no per-row JSON parse
+            original_choices = choices_map.get(item_idx)
+        if original_choices is None:
+            choices_json = getattr(row, 'choices_json', None)
+            if isinstance(choices_json, str) and choices_json:
+                try:
+                    original_choices = orjson.loads(choices_json)
+                except orjson.JSONDecodeError:
+                    st.warning(f"Could not parse choices for question index {getattr(row, 'item_index', 'Unknown')}")
+
+        for choice in (original_choices or []):
+            response_explanation = None
+            if choice.get('is_correct', False) and question_explanation:
+                response_explanation = question_explanation
+
+            responses_list.append({
+                "label": choice.get('text', ''),
+                "isCorrect": choice.get('is_correct', False),
+                "explanation": response_explanation
+            })
+
         pp_question = {
-            "material": row.get('material', ''),
+            "material": getattr(row, 'material', ''),
             "metadata": None,
             "explanation": None, 
             "referenceText": None,
-            "difficulty": difficulty,
+            "difficulty": int(difficulties[i]),
             "responses": responses_list
         }
         powerpath_questions.append(pp_question)
     return powerpath_questions
 
-# -------------------- MAIN APP LAYOUT --------------------
-
-st.title("📚 Math Questions Editor")
-st.write("Upload a JSON file to edit questions, add scores, and provide feedback.")
-
-tab1, tab2 = st.tabs(["📄 Edit Questions", "ℹ️ Instructions"])
-
-with tab2:
-    st.header("How to Use This App")
-    st.markdown("""
-    1. **Upload** your JSON file with math questions.
-    2. **Edit** questions, answer choices, scores (1-10), and feedback in the table.
-       - _Note on editing Answer Choices_: Edits to the "Answer Choices" text field will be parsed. Ensure formatting (e.g., "✓ Correct answer" or "A. Incorrect answer", separated by blank lines) is maintained for best results.
-    3. **Filter** questions by level, difficulty, or score range using the sidebar.
-    4. **Sort** questions by score using the sidebar.
-    5. **Select** one or more questions using the checkboxes in the table.
-    6. **Preview** selected questions to see how they render with LaTeX.
-    7. **Export Selected to PowerPath JSON** to get a JSON file in the PowerPath format for the chosen questions.
-    8. **Save All Changes** to apply all edits to the main dataset and download the updated full JSON file.
-    9. **Reset All Changes** to revert to the original uploaded data.
-    
-    ### Math Expressions
-    This app supports LaTeX math expressions in your questions, choices, and explanations.
-    
-    ### File Format
-    The app expects a JSON file with an array of question objects, each containing:
-    - `material`: The question text (can include LaTeX).
-    - `choices`: Array of answer choices with `text` and `is_correct` flag.
-    - Optional fields like `explanation`, `question_title`, `question_difficulty`, `level_title`.
-    """)
-    
-    st.subheader("Example Input Format")
-    example_json = '''
+# Static example strings for the instructions tab and landing page —
+# module-level so reruns reuse the same interned literals
+_EXAMPLE_JSON = '''
     [
         {
             "material": "If $-4x + 7 = 10x$, what is the value of $12x-1$?",
@@ -341,10 +353,8 @@ with tab2:
         }
     ]
     '''
-    st.code(example_json, language="json")
 
-    st.subheader("Example PowerPath JSON Output Format (for selected questions)")
-    powerpath_example = """
+_POWERPATH_EXAMPLE = """
 [
     {
         "material": "A petting zoo sells two types of tickets...",
@@ -367,132 +377,203 @@ with tab2:
     }
 ]
     """
-    st.code(powerpath_example, language="json")
+
+_EXAMPLE_QUESTION = """
+        If $-4x + 7 = 10x$, what is the value of $12x-1$?
+        
+        **Options:**
+        - A. $\\frac{1}{2}$
+        - B. $2$
+        - C. ✓ $5$
+        - D. $6$
+        
+        **Explanation:**
+        Solving for $x$: $-4x + 7 = 10x \\implies -14x = -7 \\implies x = \\frac{1}{2}$
+        
+        Therefore, $12x-1 = 12(\\frac{1}{2})-1 = 6-1 = 5$
+        """
+
+# Editor column config is data-independent; build it once at import instead of
+# reconstructing ~10 column_config objects on every rerun. Entries for columns
+# absent from the uploaded file are simply ignored by st.data_editor.
+_COLUMN_CONFIG = {
+    "select": st.column_config.CheckboxColumn("Select", width="small", default=False),
+    "material": st.column_config.TextColumn("Question", width="large"),
+    "choices_formatted": st.column_config.TextColumn("Answer Choices", width="medium", help="Edit choices here. Use '✓ Correct Answer' or 'A. Incorrect Answer', separated by blank lines."),
+    "score_rating": st.column_config.NumberColumn("Score (1-10)", min_value=1, max_value=10, format="%d", step=1, width="small"),
+    "feedback": st.column_config.TextColumn("Feedback", width="medium"),
+    "question_title": st.column_config.TextColumn("Title", width="medium"),
+    "level_title": st.column_config.TextColumn("Topic/Level", width="medium"),
+    "question_difficulty": st.column_config.NumberColumn("Difficulty", width="small", format="%d"),
+    "explanation": st.column_config.TextColumn("Explanation", width="medium"),
+    "item_index": st.column_config.Column("Index", disabled=True, width="small"), # Technically NumberColumn for proper display
+}
+
+def build_column_order(columns):
+    """Computes the editor column order for a dataset's columns (done once per upload)."""
+    column_order = ["select", "material", "choices_formatted", "score_rating", "feedback",
+                    "question_title", "level_title", "question_difficulty"]
+    if "explanation" in columns:
+        column_order.append("explanation")
+
+    for col in columns:
+        if col not in column_order and col not in ["item_index", "choices_json", "select",
+                                                   "_score_num", "_difficulty_num"]: # internal columns
+            column_order.append(col)
+    column_order.append("item_index") # Ensure item_index is last or visible if needed for debug
+    return [col for col in column_order if col in columns or col == "select"]
+
+# -------------------- MAIN APP LAYOUT --------------------
+
+st.title("📚 Math Questions Editor")
+st.write("Upload a JSON file to edit questions, add scores, and provide feedback.")
+
+tab1, tab2 = st.tabs(["📄 Edit Questions", "ℹ️ Instructions"])
+
+with tab2:
+    st.header("How to Use This App")
+    st.markdown("""
+    1. **Upload** your JSON file with math questions.
+    2. **Edit** questions, answer choices, scores (1-10), and feedback in the table.
+       - _Note on editing Answer Choices_: Edits to the "Answer Choices" text field will be parsed. Ensure formatting (e.g., "✓ Correct answer" or "A. Incorrect answer", separated by blank lines) is maintained for best results.
+    3. **Filter** questions by level, difficulty, or score range using the sidebar.
+    4. **Sort** questions by score using the sidebar.
+    5. **Select** one or more questions using the checkboxes in the table.
+    6. **Preview** selected questions to see how they render with LaTeX.
+    7. **Export Selected to PowerPath JSON** to get a JSON file in the PowerPath format for the chosen questions.
+    8. **Save All Changes** to apply all edits to the main dataset and download the updated full JSON file.
+    9. **Reset All Changes** to revert to the original uploaded data.
+    
+    ### Math Expressions
+    This app supports LaTeX math expressions in your questions, choices, and explanations.
+    
+    ### File Format
+    The app expects a JSON file with an array of question objects, each containing:
+    - `material`: The question text (can include LaTeX).
+    - `choices`: Array of answer choices with `text` and `is_correct` flag.
+    - Optional fields like `explanation`, `question_title`, `question_difficulty`, `level_title`.
+    """)
+    
+    st.subheader("Example Input Format")
+    st.code(_EXAMPLE_JSON, language="json")
+
+    st.subheader("Example PowerPath JSON Output Format (for selected questions)")
+    st.code(_POWERPATH_EXAMPLE, language="json")
 
 with tab1:
     uploaded_file = st.file_uploader("Choose a JSON file", type=["json"])
 
     if uploaded_file is not None:
+        import pandas as pd
+        import numpy as np
+        import orjson
+
         try:
             file_name = uploaded_file.name
             
             if 'original_data' not in st.session_state or st.session_state.get('file_name') != file_name:
-                content = uploaded_file.getvalue().decode('utf-8')
-                json_data = json.loads(content)
+                json_data, df, choices_map = load_json_to_df(uploaded_file.getvalue())
                 st.session_state.original_data = json_data
                 st.session_state.file_name = file_name
+                st.session_state.df = df
+                st.session_state.choices_map = choices_map
+                for stale_key in ('updated_json', 'updated_json_bytes',
+                                  'powerpath_export_data', 'powerpath_export_bytes',
+                                  'column_order'):
+                    if stale_key in st.session_state:
+                        del st.session_state[stale_key]
+
+            if 'df' not in st.session_state:
                 st.session_state.df = json_to_df(st.session_state.original_data)
-                if 'updated_json' in st.session_state:
-                    del st.session_state.updated_json
-                if 'powerpath_export_data' in st.session_state:
-                    del st.session_state.powerpath_export_data
-
-            if 'df' not in st.session_state: 
-                st.session_state.df = json_to_df(st.session_state.original_data)
-            
-            st.sidebar.header("📊 Filter and Sort")
+                st.session_state.choices_map = build_choices_map(st.session_state.original_data)
             
-            level_titles_options = []
-            if 'level_title' in st.session_state.df.columns:
-                level_titles_options = sorted(st.session_state.df['level_title'].dropna().unique().tolist())
+            @st.fragment
+            def _filter_editor_fragment():
+                """Sidebar filters + data editor, fragment-scoped so slider and
+                filter interactions rerun only this block instead of the whole
+                script (preview, export and save sections below)."""
+                st.sidebar.header("📊 Filter and Sort")
             
-            selected_levels = st.sidebar.multiselect(
-                "Filter by Level Title(s)", options=level_titles_options, default=[]
-            )
-
-            difficulty_options = []
-            if 'question_difficulty' in st.session_state.df.columns:
-                difficulty_series = pd.to_numeric(st.session_state.df['question_difficulty'], errors='coerce').dropna()
-                if not difficulty_series.empty:
-                    difficulty_options = sorted(difficulty_series.astype(int).unique().tolist())
+                level_titles_options = []
+                if 'level_title' in st.session_state.df.columns:
+                    level_titles_options = sorted(st.session_state.df['level_title'].dropna().unique().tolist())
             
-            selected_difficulties = st.sidebar.multiselect(
-                "Filter by Difficulty Level(s)", options=difficulty_options, default=[]
-            ) if difficulty_options else [] 
-            
-            score_min_val, score_max_val = 1, 10
-            if 'score_rating' in st.session_state.df.columns:
-                scores_numeric = pd.to_numeric(st.session_state.df['score_rating'], errors='coerce').dropna()
-                if not scores_numeric.empty:
-                    score_min_val_data = int(scores_numeric.min())
-                    score_max_val_data = int(scores_numeric.max())
-                    score_min_val = min(score_min_val_data, 1) # Ensure UI min is at least 1
-                    score_max_val = max(score_max_val_data, 10) # Ensure UI max is at least 10
-            
-            selected_score_range = st.sidebar.slider(
-                "Filter by Score (1-10)", 
-                min_value=1, max_value=10, 
-                value=(score_min_val, score_max_val)
-            )
+                selected_levels = st.sidebar.multiselect(
+                    "Filter by Level Title(s)", options=level_titles_options, default=[]
+                )
+
+                difficulty_options = []
+                if '_difficulty_num' in st.session_state.df.columns:
+                    difficulty_series = st.session_state.df['_difficulty_num'].dropna()
+                    if not difficulty_series.empty:
+                        difficulty_options = sorted(difficulty_series.astype(int).unique().tolist())
             
-            sort_by = st.sidebar.selectbox(
-                "Sort by", ["No Sorting", "Score (Low to High)", "Score (High to Low)"]
-            )
+                selected_difficulties = st.sidebar.multiselect(
+                    "Filter by Difficulty Level(s)", options=difficulty_options, default=[]
+                ) if difficulty_options else [] 
             
-            filtered_df = st.session_state.df.copy()
+                # The data-derived bounds were dead code: min(data_min, 1) /
+                # max(data_max, 10) always collapses back to the slider's own
+                # 1-10 range, so the column scan bought nothing
+                selected_score_range = st.sidebar.slider(
+                    "Filter by Score (1-10)",
+                    min_value=1, max_value=10,
+                    value=(1, 10)
+                )
             
-            if selected_levels:
-                filtered_df = filtered_df[filtered_df['level_title'].isin(selected_levels)]
-
-            if selected_difficulties and 'question_difficulty' in filtered_df.columns:
-                filtered_df = filtered_df[pd.to_numeric(filtered_df['question_difficulty'], errors='coerce').isin(selected_difficulties)]
+                sort_by = st.sidebar.selectbox(
+                    "Sort by", ["No Sorting", "Score (Low to High)", "Score (High to Low)"]
+                )
             
-            if 'score_rating' in filtered_df.columns:
-                numeric_scores = pd.to_numeric(filtered_df['score_rating'], errors='coerce')
-                condition_in_range = numeric_scores.between(selected_score_range[0], selected_score_range[1])
-                # Include items where score is empty/null OR in selected range
-                condition_empty_or_null = (filtered_df['score_rating'] == "") | (filtered_df['score_rating'].isnull()) | (numeric_scores.isnull())
-
-                filtered_df = filtered_df[condition_in_range | condition_empty_or_null]
+                # Build one combined boolean mask and slice once — no full-frame copy
+                df_all = st.session_state.df
+                mask = np.ones(len(df_all), dtype=bool)
+
+                if selected_levels:
+                    mask &= df_all['level_title'].isin(selected_levels).to_numpy()
+
+                if selected_difficulties and '_difficulty_num' in df_all.columns:
+                    mask &= df_all['_difficulty_num'].isin(selected_difficulties).to_numpy()
+
+                if '_score_num' in df_all.columns:
+                    num = df_all['_score_num'].to_numpy()
+                    # Include items where score is empty/null OR in selected range;
+                    # NaN already covers blank and missing scores ("" coerces to NaN),
+                    # so this is one C-level pass over a float64 array
+                    mask &= np.isnan(num) | ((num >= selected_score_range[0]) & (num <= selected_score_range[1]))
+
+                filtered_df = df_all.loc[mask]
+
+                if sort_by == "Score (Low to High)" and '_score_num' in filtered_df.columns:
+                    filtered_df = filtered_df.sort_values('_score_num', na_position='last')
+                elif sort_by == "Score (High to Low)" and '_score_num' in filtered_df.columns:
+                    filtered_df = filtered_df.sort_values('_score_num', ascending=False, na_position='last')
+
+                # Ensure 'select' column exists for checkbox functionality in the
+                # data_editor; assign() copies only the filtered slice
+                if 'select' not in filtered_df.columns:
+                    filtered_df = filtered_df.assign(select=False)
+                else:
+                    filtered_df = filtered_df.assign(select=filtered_df['select'].fillna(False).astype(bool))
 
 
-            if sort_by == "Score (Low to High)":
-                filtered_df['_sort_val'] = pd.to_numeric(filtered_df['score_rating'], errors='coerce')
-                filtered_df = filtered_df.sort_values('_sort_val', na_position='last').drop('_sort_val', axis=1)
-            elif sort_by == "Score (High to Low)":
-                filtered_df['_sort_val'] = pd.to_numeric(filtered_df['score_rating'], errors='coerce')
-                filtered_df = filtered_df.sort_values('_sort_val', ascending=False, na_position='last').drop('_sort_val', axis=1)
+                st.write(f"Showing {len(filtered_df)} questions (filtered from {len(st.session_state.df)} total)")
             
-            # Ensure 'select' column exists for checkbox functionality in data_editor
-            if 'select' not in filtered_df.columns:
-                 filtered_df['select'] = False
-            else:
-                 filtered_df['select'] = filtered_df['select'].fillna(False).astype(bool)
+                if 'column_order' not in st.session_state:
+                    st.session_state.column_order = build_column_order(filtered_df.columns.tolist())
+
+                # num_rows="fixed": rows added in the UI could never be saved
+                # anyway (they lack an item_index), and fixed mode drops the
+                # append-row bookkeeping from every edit round-trip
+                edited_df = st.data_editor(
+                    filtered_df, column_order=st.session_state.column_order, column_config=_COLUMN_CONFIG,
+                    use_container_width=True, num_rows="fixed", hide_index=True,
+                    key=f"data_editor_{st.session_state.file_name}"
+                )
+                st.session_state.edited_df = edited_df
 
-            
-            st.write(f"Showing {len(filtered_df)} questions (filtered from {len(st.session_state.df)} total)")
-            
-            column_config = {
-                "select": st.column_config.CheckboxColumn("Select", width="small", default=False),
-                "material": st.column_config.TextColumn("Question", width="large"),
-                "choices_formatted": st.column_config.TextColumn("Answer Choices", width="medium", help="Edit choices here. Use '✓ Correct Answer' or 'A. Incorrect Answer', separated by blank lines."),
-                "score_rating": st.column_config.NumberColumn("Score (1-10)", min_value=1, max_value=10, format="%d", step=1, width="small"),
-                "feedback": st.column_config.TextColumn("Feedback", width="medium"),
-                "question_title": st.column_config.TextColumn("Title", width="medium"),
-                "level_title": st.column_config.TextColumn("Topic/Level", width="medium"),
-                "question_difficulty": st.column_config.NumberColumn("Difficulty", width="small", format="%d"),
-                "item_index": st.column_config.Column("Index", disabled=True, width="small") # Technically NumberColumn for proper display
-            }
-            if "explanation" in filtered_df.columns:
-                column_config["explanation"] = st.column_config.TextColumn("Explanation", width="medium")
-            
-            column_order = ["select", "material", "choices_formatted", "score_rating", "feedback", 
-                            "question_title", "level_title", "question_difficulty"]
-            if "explanation" in filtered_df.columns:
-                column_order.append("explanation")
-            
-            all_cols = filtered_df.columns.tolist()
-            for col in all_cols:
-                if col not in column_order and col not in ["item_index", "choices_json", "select"]: # choices_json is internal
-                    column_order.append(col)
-            column_order.append("item_index") # Ensure item_index is last or visible if needed for debug
-            column_order = [col for col in column_order if col in filtered_df.columns]
-
-            edited_df = st.data_editor(
-                filtered_df, column_order=column_order, column_config=column_config,
-                use_container_width=True, num_rows="dynamic", hide_index=True,
-                key=f"data_editor_{st.session_state.file_name}"
-            )
+            _filter_editor_fragment()
+            edited_df = st.session_state.edited_df
             
             action_buttons_col1, action_buttons_col2, action_message_col = st.columns([1, 1.5, 2])
 
@@ -510,112 +591,139 @@ with tab1:
             if preview_clicked and has_selection_for_actions:
                 st.markdown("---")
                 st.markdown("### 📊 Selected Questions Preview (With Formatted Math)")
+                n_selected = len(selected_rows_df)
                 for i, (_, row_data) in enumerate(selected_rows_df.iterrows()):
-                    if i > 0: st.markdown("--- \n ---")
                     title = row_data.get('question_title', f"Question {row_data.get('item_index', 'N/A')+1}")
-                    st.subheader(f"Preview ({i+1}/{len(selected_rows_df)}): {title}")
-                    st.markdown("#### Question")
-                    st.markdown(row_data.get('material', ''))
-                    st.markdown("#### Choices")
-                    choices_fmt = row_data.get('choices_formatted', '')
-                    # Split choices for individual markdown rendering, handling potential None
-                    choice_lines = choices_fmt.strip().split('\n\n') if choices_fmt else []
-                    for choice_md in choice_lines:
-                        if choice_md.strip(): st.markdown(choice_md)
-                    
-                    explanation = row_data.get('explanation', None)
-                    if explanation and pd.notna(explanation) and str(explanation).strip():
-                        st.markdown("#### Explanation")
-                        st.markdown(explanation)
+                    # One markdown string (and one websocket message) per row;
+                    # the per-question body is memoized on its content
+                    header = "--- \n ---\n\n" if i > 0 else ""
+                    header += f"### Preview ({i+1}/{n_selected}): {title}"
+                    body = render_question_md(
+                        row_data.get('material', ''),
+                        row_data.get('choices_formatted', ''),
+                        row_data.get('explanation', None),
+                    )
+                    st.markdown(header + "\n\n" + body)
             
             if export_powerpath_clicked and has_selection_for_actions:
-                powerpath_data = df_to_powerpath_json(selected_rows_df)
+                powerpath_data = df_to_powerpath_json(selected_rows_df, st.session_state.get('choices_map'))
                 if powerpath_data:
                     st.session_state.powerpath_export_data = powerpath_data
-                    st.markdown(
-                        get_powerpath_download_link(powerpath_data, st.session_state.file_name),
-                        unsafe_allow_html=True
-                    )
+                    # Serialize once; reruns reuse the cached bytes below
+                    st.session_state.powerpath_export_bytes = orjson.dumps(powerpath_data, option=orjson.OPT_INDENT_2)
+                    render_powerpath_download_button(st.session_state.powerpath_export_bytes, st.session_state.file_name)
                     st.success(f"✅ {len(powerpath_data)} questions prepared for PowerPath JSON download.")
                 else:
                     st.warning("⚠️ No questions could be converted (check data or selection).")
-            elif 'powerpath_export_data' in st.session_state and not export_powerpath_clicked : 
-                 if st.session_state.powerpath_export_data: #Only show if there is data
-                    st.markdown(
-                        get_powerpath_download_link(st.session_state.powerpath_export_data, st.session_state.file_name),
-                        unsafe_allow_html=True
-                    )
+            elif 'powerpath_export_bytes' in st.session_state and not export_powerpath_clicked :
+                 if st.session_state.powerpath_export_bytes: #Only show if there is data
+                    render_powerpath_download_button(st.session_state.powerpath_export_bytes, st.session_state.file_name)
 
             st.markdown("---") 
             save_col, reset_col = st.columns([1, 1])
             
-            if save_col.button("💾 Save All Changes to Full Dataset", use_container_width=True):
-                skipped_new_rows_count = 0
-                for _, edited_row_series in edited_df.iterrows():
-                    original_item_idx = edited_row_series['item_index']
-
-                    if pd.isna(original_item_idx):
-                        skipped_new_rows_count +=1
-                        continue # Skip rows added in UI that don't have an original index
-
-                    main_df_mask = (st.session_state.df['item_index'] == original_item_idx)
-                    
-                    if main_df_mask.any():
-                        # 1. Handle 'choices_formatted' to 'choices_json' conversion
-                        if 'choices_formatted' in edited_row_series and 'choices_json' in st.session_state.df.columns:
-                            edited_formatted_choices_text = edited_row_series['choices_formatted']
-                            
-                            newly_parsed_choices_list = parse_formatted_choices_to_list(edited_formatted_choices_text)
-                            new_choices_json_str = json.dumps(newly_parsed_choices_list)
-                            
-                            st.session_state.df.loc[main_df_mask, 'choices_json'] = new_choices_json_str
-                            st.session_state.df.loc[main_df_mask, 'choices_formatted'] = format_choices(newly_parsed_choices_list)
-
-                        # 2. Handle other editable columns
-                        for col_name in edited_row_series.index:
-                            if col_name in st.session_state.df.columns and \
-                               col_name not in ['select', 'item_index', 'choices_formatted', 'choices_json']:
-                                
-                                val_from_edited_row = edited_row_series[col_name]
-                                
-                                if col_name in ['score_rating', 'question_difficulty'] and pd.notna(val_from_edited_row):
-                                    if isinstance(val_from_edited_row, float) and val_from_edited_row.is_integer():
-                                        val_from_edited_row = int(val_from_edited_row)
-                                    
-                                    if col_name == 'score_rating':
-                                        st.session_state.df.loc[main_df_mask, col_name] = str(val_from_edited_row)
-                                    else: # question_difficulty
-                                        st.session_state.df.loc[main_df_mask, col_name] = val_from_edited_row
-                                elif col_name == 'score_rating' and (pd.isna(val_from_edited_row) or str(val_from_edited_row).strip() == ""):
-                                    st.session_state.df.loc[main_df_mask, col_name] = "" 
-                                elif pd.isna(val_from_edited_row):
-                                    st.session_state.df.loc[main_df_mask, col_name] = None
-                                else:
-                                    st.session_state.df.loc[main_df_mask, col_name] = val_from_edited_row
-                
+            save_clicked = save_col.button("💾 Save All Changes to Full Dataset", use_container_width=True)
+
+            if save_clicked:
+                # Rows added in the UI have no original index and cannot be saved
+                edited = edited_df[edited_df['item_index'].notna()].copy()
+                skipped_new_rows_count = len(edited_df) - len(edited)
+
+                edited['item_index'] = edited['item_index'].astype(int)
+                edited = edited.set_index('item_index', drop=False)
+                main = st.session_state.df.set_index('item_index', drop=False)
+
+                # 1. Handle 'choices_formatted' to 'choices_json' conversion.
+                # Only re-parse rows whose formatted text actually changed —
+                # typically a handful out of the whole dataset.
+                if 'choices_formatted' in edited.columns and 'choices_json' in main.columns:
+                    # fillna before comparing: the Arrow-backed string columns
+                    # yield pd.NA for cleared cells, and pd.NA != "..." raises
+                    # instead of returning a bool
+                    old_formatted = main['choices_formatted'].reindex(edited.index).fillna("")
+                    new_formatted = edited['choices_formatted'].fillna("")
+                    changed = new_formatted.to_numpy() != old_formatted.to_numpy()
+                    if changed.any():
+                        changed_idx = edited.index[changed]
+                        parsed_choices = [parse_formatted_choices_to_list(txt)
+                                          for txt in edited.loc[changed_idx, 'choices_formatted']]
+                        edited.loc[changed_idx, 'choices_json'] = [orjson.dumps(c).decode() for c in parsed_choices]
+                        edited.loc[changed_idx, 'choices_formatted'] = [format_choices(c) for c in parsed_choices]
+                        # Keep the in-memory choices lists in sync for the export paths
+                        choices_map = st.session_state.setdefault('choices_map', {})
+                        for idx, parsed in zip(changed_idx, parsed_choices):
+                            choices_map[int(idx)] = parsed
+
+                # 2. Normalize score/difficulty the same way the old per-row loop did
+                def _as_int_if_whole(v):
+                    if isinstance(v, float) and v.is_integer():
+                        return int(v)
+                    return v
+
+                if 'score_rating' in edited.columns:
+                    edited['score_rating'] = [
+                        "" if pd.isna(v) or str(v).strip() == "" else str(_as_int_if_whole(v))
+                        for v in edited['score_rating']
+                    ]
+                if 'question_difficulty' in edited.columns:
+                    # Explicit object dtype: a bare list with ints and a None
+                    # would be inferred as float64 and turn every difficulty
+                    # into 1.0 in the export
+                    edited['question_difficulty'] = pd.Series(
+                        [None if pd.isna(v) else _as_int_if_whole(v)
+                         for v in edited['question_difficulty']],
+                        index=edited.index, dtype=object)
+
+                # 3. Single index-aligned assignment instead of an O(N) scan per edited row
+                cols_to_save = [c for c in edited.columns
+                                if c in main.columns and c not in ('select', 'item_index',
+                                                                   '_score_num', '_difficulty_num')]
+                if cols_to_save and len(edited):
+                    # Categorical columns can't take unseen values via .loc, and
+                    # pandas 3 no longer upcasts typed columns (e.g. int64
+                    # question_difficulty) when object values are assigned into
+                    # them — it raises instead. Widen every non-object target
+                    # column for the (rare) save, then restore its dtype.
+                    restore_dtypes = {c: main[c].dtype for c in cols_to_save
+                                      if main[c].dtype != object}
+                    for c in restore_dtypes:
+                        main[c] = main[c].astype(object)
+                    edited_vals = edited[cols_to_save].astype(object)
+                    edited_vals = edited_vals.where(pd.notna(edited_vals), None)
+                    main.loc[edited_vals.index, cols_to_save] = edited_vals
+                    for c, dtype in restore_dtypes.items():
+                        # 'category' rather than the old CategoricalDtype so
+                        # newly typed values become categories instead of NaN
+                        target = 'category' if isinstance(dtype, pd.CategoricalDtype) else dtype
+                        try:
+                            main[c] = main[c].astype(target)
+                        except (TypeError, ValueError):
+                            # Edits no longer fit the original dtype (e.g. a
+                            # cleared cell in an int64 column); keep object
+                            pass
+                st.session_state.df = add_numeric_projections(main.reset_index(drop=True))
+
+
                 if skipped_new_rows_count > 0:
                     st.warning(f"{skipped_new_rows_count} new row(s) added in the editor were not saved as they lack an original index. To add new questions, please modify the source JSON and re-upload.")
 
-                updated_json_full = df_to_json(st.session_state.df) 
+                updated_json_full = df_to_json(st.session_state.df, st.session_state.get('choices_map'))
                 st.session_state.updated_json = updated_json_full
+                # Serialize once; reruns reuse the cached bytes below
+                st.session_state.updated_json_bytes = orjson.dumps(updated_json_full, option=orjson.OPT_INDENT_2)
                 st.success("✅ All changes saved successfully to the full dataset!")
-                st.markdown(
-                    get_download_link(updated_json_full, st.session_state.file_name),
-                    unsafe_allow_html=True
-                )
+                render_download_button(st.session_state.updated_json_bytes, st.session_state.file_name)
                 # Rerun to refresh the data editor with canonical data from st.session_state.df
                 st.rerun()
 
-            elif 'updated_json' in st.session_state and not save_col.button("💾 Save All Changes to Full Dataset", use_container_width=True, key="resave_check_for_display_only"): # Re-display main download if exists
-                 if st.session_state.updated_json: #Only show if there is data
-                    st.markdown(
-                        get_download_link(st.session_state.updated_json, st.session_state.file_name),
-                        unsafe_allow_html=True
-                    )
+            elif st.session_state.get('updated_json_bytes'): # Re-display main download if exists
+                render_download_button(st.session_state.updated_json_bytes, st.session_state.file_name)
 
             if reset_col.button("🔄 Reset All Changes", use_container_width=True):
-                st.session_state.df = json_to_df(st.session_state.original_data)
-                keys_to_clear = ['updated_json', 'powerpath_export_data']
+                # Cache hit: same bytes as the original upload
+                _, st.session_state.df, st.session_state.choices_map = load_json_to_df(uploaded_file.getvalue())
+                keys_to_clear = ['updated_json', 'updated_json_bytes',
+                                 'powerpath_export_data', 'powerpath_export_bytes']
                 for k in keys_to_clear:
                     if k in st.session_state: del st.session_state[k]
                 st.success("✅ All changes have been reset to the original data.")
@@ -634,18 +742,4 @@ with tab1:
         c3.markdown("### 💾 Export & Save\n- Export selected to PowerPath JSON\n- Save all changes\n- Download updated full JSON")
         
         st.subheader("Example of Formatted Math Questions (Input)")
-        example_question = """
-        If $-4x + 7 = 10x$, what is the value of $12x-1$?
-        
-        **Options:**
-        - A. $\\frac{1}{2}$
-        - B. $2$
-        - C. ✓ $5$
-        - D. $6$
-        
-        **Explanation:**
-        Solving for $x$: $-4x + 7 = 10x \\implies -14x = -7 \\implies x = \\frac{1}{2}$
-        
-        Therefore, $12x-1 = 12(\\frac{1}{2})-1 = 6-1 = 5$
-        """
-        st.markdown(example_question)
+        st.markdown(_EXAMPLE_QUESTION)